@@ -0,0 +1,76 @@
+"""
+Measure how long each CLI subcommand takes to import along `rightmove-scraper`'s startup path,
+in a fresh interpreter each time.
+
+Exits non-zero if a subcommand imports a module it should not need,
+or if its median import time exceeds the given budget.
+
+    python -m benchmarks.import_time [--repeat N] [--budget-ms MS]
+"""
+
+import json
+import subprocess
+import sys
+from argparse import ArgumentParser
+from statistics import median
+
+from rightmove_scraper.cli import COMMAND_MODULES
+
+# modules that must not be imported just to run a given subcommand
+FORBIDDEN_MODULES = {
+    "sitemaps": {"bs4"},
+    "locations": set(),
+    "mappings": {"bs4", "lxml", "tqdm"},
+    "serve": {"bs4", "lxml", "tqdm"},
+}
+
+# the same imports `cli.main` makes for a command, in the same order (`--help` would exit before reaching them)
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from rightmove_scraper.cli import import_command
+from utils_python import setup_tqdm_logger
+from rightmove_scraper.config import Config
+import_command({command!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def probe(command: str) -> tuple[float, set[str]]:
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(command=command)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    result = json.loads(output)
+    return result["seconds"], {module.split(".")[0] for module in result["modules"]}
+
+
+def main() -> int:
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("-b", "--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for command in COMMAND_MODULES:
+        timings = []
+        for _ in range(args.repeat):
+            seconds, modules = probe(command)
+            timings.append(seconds * 1000)
+        median_ms = median(timings)
+        unexpected = FORBIDDEN_MODULES[command] & modules
+        print(f"{command:>10}: median {median_ms:7.1f} ms (min {min(timings):.1f}, max {max(timings):.1f})")
+        if unexpected:
+            print(f"{command:>10}: unexpectedly imported {sorted(unexpected)}")
+            failed = True
+        if args.budget_ms is not None and median_ms > args.budget_ms:
+            print(f"{command:>10}: over budget of {args.budget_ms} ms")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Load-test a running lookup server (`rightmove-scraper serve`) at a fixed request rate and report latency percentiles.
+
+Requests are issued open-loop, so a slow server shows up as higher latency rather than a lower request rate.
+Query names are sampled from a mappings file if one is given.
+
+    python -m benchmarks.lookup_load [--url URL] [--rate QPS] [--duration S] [--batch-size N] [--mappings-file PATH]
+"""
+
+import json
+import random
+import time
+import urllib.request
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from statistics import quantiles
+from threading import Lock
+from urllib.parse import urlencode
+
+PERCENTILES = [50, 90, 95, 99]
+
+
+def load_names(mappings_file: Path | None) -> list[str]:
+    if mappings_file is None:
+        return [f"Station {i}" for i in range(1000)]
+    with open(mappings_file) as f:
+        mappings = json.load(f)
+    return [entry["name"] for entries in mappings.values() for entry in entries]
+
+
+def make_request(url: str, names: list[str], batch_size: int) -> urllib.request.Request:
+    if batch_size == 1:
+        return urllib.request.Request(f"{url}/lookup?{urlencode({'name': random.choice(names)})}")
+    body = json.dumps({"queries": [{"name": name} for name in random.choices(names, k=batch_size)]}).encode()
+    return urllib.request.Request(
+        f"{url}/lookup",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("-r", "--rate", type=float, default=200, help="requests per second")
+    parser.add_argument("-d", "--duration", type=float, default=10, help="seconds")
+    parser.add_argument("-b", "--batch-size", type=int, default=1, help="queries per request (>1 uses POST)")
+    parser.add_argument("-w", "--workers", type=int, default=32)
+    parser.add_argument("-m", "--mappings-file", type=Path, default=None)
+    args = parser.parse_args()
+
+    names = load_names(args.mappings_file)
+    latencies: list[float] = []
+    errors = 0
+    lock = Lock()
+
+    def send(request: urllib.request.Request) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                response.read()
+        except OSError:
+            with lock:
+                errors += 1
+            return
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    total = int(args.rate * args.duration)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.workers) as executor:
+        for i in range(total):
+            if (delay := start + i / args.rate - time.perf_counter()) > 0:
+                time.sleep(delay)
+            executor.submit(send, make_request(args.url, names, args.batch_size))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(latencies)} ok, {errors} errors in {elapsed:.1f} s ({len(latencies) / elapsed:.0f} req/s achieved)")
+    if len(latencies) >= 2:
+        cuts = quantiles(latencies, n=100)
+        summary = ", ".join(f"p{p} {cuts[p - 1] * 1000:.2f} ms" for p in PERCENTILES)
+        print(f"latency: {summary}, max {max(latencies) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
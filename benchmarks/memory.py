@@ -0,0 +1,106 @@
+"""
+Compare the memory used by `ResultDict`s against `LocationRecord`s for a synthetic set of results,
+both at rest and at peak while writing them out as step 2 does after every result.
+
+    python -m benchmarks.memory [--count N]
+"""
+
+import gc
+import json
+import random
+import string
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any, Callable
+
+from rightmove_scraper.models import DEFAULT_QUERY, LocationType, ResultDict
+from rightmove_scraper.records import iter_result_dicts, records_from_entries
+from rightmove_scraper.urls import make_scrape_url
+from rightmove_scraper.utils import dump_json_items
+
+
+def make_result_dicts(count: int, area_count: int) -> dict[str, ResultDict]:
+    rng = random.Random(0)
+    areas = ["".join(rng.choices(string.ascii_letters, k=12)) for _ in range(area_count)]
+    results: dict[str, ResultDict] = {}
+    for index in range(count):
+        identifier = f"{LocationType.POSTCODE}^{index}"
+        results[identifier] = {
+            "identifier": identifier,
+            "name": f"AB{index % 100} {index % 10}CD",
+            # separate string objects for equal areas, as json.loads would produce
+            "area": "".join(rng.choice(areas)),
+            "type": LocationType.POSTCODE,
+            "index": index,
+            "url": make_scrape_url(identifier, **DEFAULT_QUERY),
+            "closest_property_coords": (rng.uniform(50, 58), rng.uniform(-6, 2)),
+        }
+    return results
+
+
+def measure(build: Callable[[], Any]) -> tuple[int, Any]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, result
+
+
+def measure_write(build: Callable[[], Any], write: Callable[[Any], None]) -> tuple[int, float]:
+    """
+    Peak memory while `write` runs, counting what `build` left allocated, and how long `write` takes.
+
+    The write is timed separately, untraced, as tracing slows it down severalfold.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        data = build()
+        tracemalloc.reset_peak()
+        write(data)
+        _size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    start = time.perf_counter()
+    write(data)
+    return peak, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=200_000)
+    parser.add_argument("-a", "--area-count", type=int, default=2_000)
+    args = parser.parse_args()
+
+    # both are measured from freshly loaded JSON, as step 2 reads them, so that every string is counted
+    results_json = json.dumps(make_result_dicts(args.count, args.area_count))
+    dict_size, _result_dicts = measure(lambda: json.loads(results_json))
+    record_size, _records = measure(lambda: records_from_entries(json.loads(results_json))[0])
+    print(f"{args.count} results")
+    print(f"  ResultDict:     {dict_size / 2**20:8.1f} MiB ({dict_size / args.count:6.0f} B/result)")
+    print(f"  LocationRecord: {record_size / 2**20:8.1f} MiB ({record_size / args.count:6.0f} B/result)")
+    del _result_dicts, _records
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir, "results.json")
+        dict_peak, dict_seconds = measure_write(
+            lambda: json.loads(results_json),
+            lambda result_dicts: path.write_text(json.dumps(result_dicts)),
+        )
+        record_peak, record_seconds = measure_write(
+            lambda: records_from_entries(json.loads(results_json))[0],
+            lambda records: dump_json_items(iter_result_dicts(records.values()), path),
+        )
+    print("peak while writing (time per write)")
+    print(f"  ResultDict:     {dict_peak / 2**20:8.1f} MiB ({dict_seconds:.2f} s)")
+    print(f"  LocationRecord: {record_peak / 2**20:8.1f} MiB ({record_seconds:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
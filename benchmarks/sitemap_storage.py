@@ -0,0 +1,80 @@
+"""
+Compare disk usage and parse time of raw vs gzipped sitemaps, using a synthetic stations sitemap.
+
+"raw" reads an uncompressed file by parsing the whole tree (as sitemaps used to be read);
+"gzip" streams a compressed file through `iter_sitemap_locs`.
+
+    python -m benchmarks.sitemap_storage [--count N] [--repeat N]
+"""
+
+import gzip
+import re
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable
+
+from rightmove_scraper.utils import SITEMAP_NAMESPACE, iter_sitemap_locs
+
+PATTERN = re.compile(r"STATION%5E(\d+)")
+
+
+def make_sitemap(count: int) -> bytes:
+    urls = "".join(
+        f"<url><loc>https://www.rightmove.co.uk/property-to-rent/find.html?locationIdentifier=STATION%5E{i}</loc>"
+        f"<lastmod>2024-01-01</lastmod><changefreq>daily</changefreq></url>"
+        for i in range(count)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NAMESPACE}">{urls}</urlset>'.encode()
+
+
+def read_raw(path: Path) -> set[int]:
+    tree = ET.parse(path)
+    namespace = {"": SITEMAP_NAMESPACE}
+    indices = set()
+    for url in tree.getroot().findall(".//url", namespace):
+        loc_element = url.find("loc", namespace)
+        if loc_element is not None and isinstance(loc_element.text, str):
+            if match := PATTERN.search(loc_element.text.strip()):
+                indices.add(int(match.group(1)))
+    return indices
+
+
+def read_streamed(path: Path) -> set[int]:
+    return {int(match.group(1)) for loc in iter_sitemap_locs(path) if (match := PATTERN.search(loc))}
+
+
+def best_time(read: Callable[[Path], set[int]], path: Path, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=50_000)
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sitemap = make_sitemap(args.count)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = Path(tmp, "sitemap-stations-1.xml")
+        gzip_path = raw_path.with_name(f"{raw_path.name}.gz")
+        raw_path.write_bytes(sitemap)
+        gzip_path.write_bytes(gzip.compress(sitemap))
+        assert read_raw(raw_path) == read_streamed(gzip_path)
+
+        print(f"{args.count} urls")
+        for label, path, read in [("raw", raw_path, read_raw), ("gzip", gzip_path, read_streamed)]:
+            size = path.stat().st_size
+            seconds = best_time(read, path, args.repeat)
+            print(f"  {label:>4}: {size / 2**20:7.2f} MiB on disk, parsed in {seconds * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import logging
+from argparse import ArgumentParser
+from importlib import import_module
+from pprint import pformat
+from types import ModuleType
+from typing import Sequence
+
+from rightmove_scraper.base_args import BaseArgsNamespace, add_base_args
+
+LOGGER = logging.getLogger(__name__)
+
+# Subcommand -> module providing `run(config, args)`.
+# Modules are only imported once their subcommand is chosen, so e.g. `mappings` never pays for bs4/lxml.
+COMMAND_MODULES = {
+    "sitemaps": "rightmove_scraper.commands.sitemaps",
+    "locations": "rightmove_scraper.commands.locations",
+    "mappings": "rightmove_scraper.commands.mappings",
+    "serve": "rightmove_scraper.commands.serve",
+}
+
+
+class ArgsNamespace(BaseArgsNamespace):
+    command: str
+    start_index: int | None
+    end_index: int | None
+    refresh: int | None
+    ttl: float | None
+    host: str
+    port: int
+    reload_interval: float
+
+
+def make_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="rightmove-scraper")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_base_args(subparsers.add_parser("sitemaps", help="step 1: retrieve sitemaps"))
+
+    locations_parser = add_base_args(subparsers.add_parser("locations", help="step 2: get results for each location"))
+    locations_parser.add_argument(
+        "-s",
+        "--start-index",
+        type=int,
+        default=None,
+    )
+    locations_parser.add_argument(
+        "-e",
+        "--end-index",
+        type=int,
+        default=None,
+    )
+    locations_parser.add_argument(
+        "-r",
+        "--refresh",
+        type=int,
+        default=None,
+        metavar="MAX_REQUESTS",
+        help="instead of crawling forwards, re-scrape up to this many of the stalest existing results",
+    )
+    locations_parser.add_argument(
+        "--ttl",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="with --refresh, only re-scrape results older than this",
+    )
+
+    add_base_args(subparsers.add_parser("mappings", help="step 3: generate mappings from location files"))
+
+    serve_parser = add_base_args(subparsers.add_parser("serve", help="serve identifier lookups from the mappings"))
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="default: '%(default)s'",
+    )
+    serve_parser.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=8765,
+        help="default: %(default)s",
+    )
+    serve_parser.add_argument(
+        "--reload-interval",
+        type=float,
+        default=5.0,
+        help="seconds between checks for rewritten mapping files (default: %(default)s)",
+    )
+    return parser
+
+
+def parse_args(argv: Sequence[str] | None = None) -> ArgsNamespace:
+    return make_parser().parse_args(argv, namespace=ArgsNamespace())
+
+
+def import_command(command: str) -> ModuleType:
+    return import_module(COMMAND_MODULES[command])
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+
+    from utils_python import setup_tqdm_logger
+
+    from rightmove_scraper.config import Config
+
+    setup_tqdm_logger(level=logging.INFO)
+    config = Config.from_file(args.app_config_path)
+    LOGGER.info("loaded config:\n%s", pformat(config.model_dump()))
+    import_command(args.command).run(config, args)
+
+
+if __name__ == "__main__":
+    main()
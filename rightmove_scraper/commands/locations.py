@@ -0,0 +1,72 @@
+import logging
+from argparse import Namespace
+from typing import TYPE_CHECKING
+
+from rightmove_scraper.config import (
+    make_rightmove_location_scraper,
+    make_rightmove_sitemap_scraper,
+)
+from rightmove_scraper.location_scraper import (
+    get_sitemap_category,
+    iter_indices_from_sitemap_paths,
+)
+from rightmove_scraper.utils import iter_in_background
+
+if TYPE_CHECKING:
+    from rightmove_scraper.config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_and_write_all(
+    config: "Config",
+    start_index: int | None = None,
+    end_index: int | None = None,
+) -> None:
+
+    rightmove_location_scraper = make_rightmove_location_scraper(config.location, config.sitemap.dir)
+    if not rightmove_location_scraper.uses_sitemap_indices:
+        # the crawl doesn't depend on the sitemaps, so download them up front and fail fast, as a separate step
+        make_rightmove_sitemap_scraper(config.sitemap).get_and_download_sitemaps()
+        rightmove_location_scraper.get_and_write_all(start_index, end_index)
+        return
+
+    # sitemaps are downloaded from the same host while the locations are crawled, so both share the location
+    # crawl's rate limit and back off together when either is throttled
+    rightmove_sitemap_scraper = make_rightmove_sitemap_scraper(
+        config.sitemap,
+        rightmove_location_scraper.rate_controller,
+    )
+
+    # download sitemaps in the background while crawling, feeding in each sitemap's indices as soon as it arrives
+    sitemap_paths = iter_in_background(rightmove_sitemap_scraper.iter_sitemap_paths(), name="sitemap-downloader")
+    location_category = get_sitemap_category(rightmove_location_scraper.location_type)
+    known_indices = iter_indices_from_sitemap_paths(
+        (sitemap_path for category, sitemap_path in sitemap_paths if category == location_category),
+        rightmove_location_scraper.location_type,
+    )
+    rightmove_location_scraper.get_and_write_all(start_index, end_index, known_indices)
+
+    # let any remaining sitemap downloads finish
+    for _category, _sitemap_path in sitemap_paths:
+        pass
+
+
+def refresh(
+    config: "Config",
+    max_requests: int,
+    ttl_seconds: float | None = None,
+) -> None:
+    rightmove_location_scraper = make_rightmove_location_scraper(config.location)
+    rightmove_location_scraper.refresh(max_requests, ttl_seconds)
+
+
+def run(config: "Config", args: Namespace) -> None:
+    if args.refresh is not None:
+        refresh(config, args.refresh, args.ttl)
+        return
+    get_and_write_all(
+        config,
+        args.start_index,
+        args.end_index,
+    )
@@ -0,0 +1,93 @@
+import json
+import logging
+from argparse import Namespace
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from utils_python import read_dict_from_file
+
+from rightmove_scraper.lookup_index import LOOKUP_INDEX_SUFFIX, build_lookup_index
+from rightmove_scraper.models import DEFAULT_CHANNEL, DEFAULT_QUERY
+from rightmove_scraper.records import LocationRecord, records_from_entries
+from rightmove_scraper.station_index import STATION_INDEX_SUFFIX, build_station_index
+from rightmove_scraper.urls import make_scrape_url_formatter
+from rightmove_scraper.utils import dump_json_items, open_replacing
+
+if TYPE_CHECKING:
+    from rightmove_scraper.config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+
+def read_records_from_file(input_filepath: Path) -> list[LocationRecord]:
+    records, _empty_indices = records_from_entries(read_dict_from_file(input_filepath))
+    return list(records.values())
+
+
+def create_mappings(
+    records: Iterable[LocationRecord],
+    key: str,
+) -> dict[str | int, list[LocationRecord]]:
+    mappings: dict[str | int, list[LocationRecord]] = {}
+    for record in records:
+        mappings.setdefault(getattr(record, key), []).append(record)
+    return mappings
+
+
+def write_mappings_from_file(
+    input_filepath: Path,
+    output_dir: Path,
+    key: str,
+    lookup_index: bool = False,
+    station_index: bool = False,
+) -> None:
+
+    output_path = Path(
+        output_dir,
+        input_filepath.with_stem(f"{input_filepath.stem}-mappings-by-{key}").name,
+    )
+    if output_path == input_filepath:
+        print(f"{output_path=} == {input_filepath=}, returning")
+
+    records = read_records_from_file(input_filepath)
+    mappings = create_mappings(records, key)
+
+    print(f"Writing to '{output_path}'")
+    format_url = make_scrape_url_formatter(DEFAULT_CHANNEL, **DEFAULT_QUERY)
+    dump_json_items(
+        (
+            (value, [record.to_result_dict(url=format_url(record.identifier)) for record in value_records])
+            for value, value_records in mappings.items()
+        ),
+        output_path,
+    )
+
+    if lookup_index:
+        lookup_index_path = get_lookup_index_path(input_filepath, output_dir)
+        print(f"Writing to '{lookup_index_path}'")
+        # replaced rather than overwritten, as a running lookup server may have the old index mapped
+        with open_replacing(lookup_index_path, "wb") as f:
+            f.write(build_lookup_index(records))
+
+    if station_index:
+        station_index_data = build_station_index(records)
+        if station_index_data["stations"]:
+            station_index_path = Path(output_dir, f"{input_filepath.stem}{STATION_INDEX_SUFFIX}").with_suffix(".json")
+            print(f"Writing to '{station_index_path}'")
+            with open_replacing(station_index_path) as f:
+                json.dump(station_index_data, f)
+
+
+def get_lookup_index_path(input_filepath: Path, output_dir: Path) -> Path:
+    return Path(output_dir, f"{input_filepath.stem}-lookup").with_suffix(LOOKUP_INDEX_SUFFIX)
+
+
+def run(config: "Config", args: Namespace) -> None:
+    for input_filepath in config.location.dir.glob("*-all.json"):
+        write_mappings_from_file(
+            input_filepath,
+            output_dir=config.mappings.dir,
+            key=config.mappings.key,
+            lookup_index=config.mappings.lookup_index,
+            station_index=config.mappings.station_index,
+        )
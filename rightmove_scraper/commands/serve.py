@@ -0,0 +1,16 @@
+from argparse import Namespace
+from typing import TYPE_CHECKING
+
+from rightmove_scraper.lookup_server import serve
+
+if TYPE_CHECKING:
+    from rightmove_scraper.config import Config
+
+
+def run(config: "Config", args: Namespace) -> None:
+    serve(
+        config.mappings.dir,
+        host=args.host,
+        port=args.port,
+        reload_interval=args.reload_interval,
+    )
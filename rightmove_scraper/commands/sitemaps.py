@@ -0,0 +1,11 @@
+from argparse import Namespace
+from typing import TYPE_CHECKING
+
+from rightmove_scraper.config import make_rightmove_sitemap_scraper
+
+if TYPE_CHECKING:
+    from rightmove_scraper.config import Config
+
+
+def run(config: "Config", args: Namespace) -> None:
+    make_rightmove_sitemap_scraper(config.sitemap).get_and_download_sitemaps()
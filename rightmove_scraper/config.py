@@ -1,17 +1,17 @@
 from io import IOBase
 from pathlib import Path
 from pprint import pprint
-from typing import Any, Self
+from typing import TYPE_CHECKING, Any, Self
 
-from pydantic import BaseModel, model_validator
+from pydantic import BaseModel, Field, model_validator
 from pydantic_yaml import parse_yaml_file_as
 
-from rightmove_scraper.location_scraper import LocationType, RightmoveLocationScraper
-from rightmove_scraper.sitemap_scraper import (
-    DEFAULT_ROOT_SITEMAP_URL,
-    RightmoveSitemapScraper,
-    SitemapType,
-)
+from rightmove_scraper.models import DEFAULT_ROOT_SITEMAP_URL, LocationType, SitemapType
+
+if TYPE_CHECKING:
+    from rightmove_scraper.location_scraper import RightmoveLocationScraper
+    from rightmove_scraper.rate_control import AdaptiveRateController
+    from rightmove_scraper.sitemap_scraper import RightmoveSitemapScraper
 
 
 class FileModel(BaseModel):
@@ -29,11 +29,25 @@ class SubConfig(FileModel):
         return values
 
 
+class RateControlConfig(BaseModel):
+    # `min_seconds_between_requests` of the parent config is the floor of the delay
+    adaptive: bool = False
+    start_seconds_between_requests: float | None = None
+    max_seconds_between_requests: float = 60.0
+    additive_increase: float = 0.05
+    backoff_factor: float = 2.0
+    latency_threshold_seconds: float = 5.0
+    max_retries: int = 5
+    report_interval_seconds: float = 60.0
+
+
 class SitemapConfig(SubConfig):
     dir: Path
     types: list[SitemapType]
     overwrite: bool = False
     root_url: str = DEFAULT_ROOT_SITEMAP_URL
+    min_seconds_between_requests: float = 0.0
+    rate_control: RateControlConfig = Field(default_factory=RateControlConfig)
 
 
 class LocationConfig(SubConfig):
@@ -42,11 +56,18 @@ class LocationConfig(SubConfig):
     min_seconds_between_requests: float = 1.0
     use_api: bool = False
     use_sitemap: bool = False
+    fetch_workers: int = 1
+    parse_workers: int = 0
+    queue_size: int = 16
+    negative_cache_ttl_seconds: float | None = None
+    rate_control: RateControlConfig = Field(default_factory=RateControlConfig)
 
 
 class MappingsConfig(SubConfig):
     dir: Path
     key: str = "name"
+    lookup_index: bool = True
+    station_index: bool = True
 
 
 class Config(FileModel):
@@ -64,24 +85,67 @@ class Config(FileModel):
         return values
 
 
-def make_rightmove_sitemap_scraper(config: SitemapConfig) -> RightmoveSitemapScraper:
+# the scrapers pull in bs4/lxml/tqdm, so they are only imported once actually needed
+
+
+def make_rate_controller(
+    config: RateControlConfig,
+    min_seconds_between_requests: float,
+    name: str,
+) -> "AdaptiveRateController":
+    from rightmove_scraper.rate_control import AdaptiveRateController
+
+    return AdaptiveRateController(
+        min_delay=min_seconds_between_requests,
+        max_delay=config.max_seconds_between_requests,
+        start_delay=config.start_seconds_between_requests,
+        adaptive=config.adaptive,
+        additive_increase=config.additive_increase,
+        backoff_factor=config.backoff_factor,
+        latency_threshold=config.latency_threshold_seconds,
+        max_retries=config.max_retries,
+        report_interval=config.report_interval_seconds,
+        name=name,
+    )
+
+
+def make_rightmove_sitemap_scraper(
+    config: SitemapConfig,
+    rate_controller: "AdaptiveRateController | None" = None,
+) -> "RightmoveSitemapScraper":
+    from rightmove_scraper.sitemap_scraper import RightmoveSitemapScraper
+
+    if rate_controller is None:
+        rate_controller = make_rate_controller(config.rate_control, config.min_seconds_between_requests, "sitemaps")
     return RightmoveSitemapScraper(
         sitemap_dir=config.dir,
         types=config.types,
         overwrite=config.overwrite,
+        rate_controller=rate_controller,
     )
 
 
 def make_rightmove_location_scraper(
     config: LocationConfig,
     sitemap_dir: Path | None = None,
-) -> RightmoveLocationScraper:
+) -> "RightmoveLocationScraper":
+    from rightmove_scraper.location_scraper import RightmoveLocationScraper
+
     return RightmoveLocationScraper(
         output_dir=config.dir,
         location_type=config.location_type,
         min_seconds_between_requests=config.min_seconds_between_requests,
         sitemap_dir=sitemap_dir,
         use_sitemap=config.use_sitemap,
+        fetch_workers=config.fetch_workers,
+        parse_workers=config.parse_workers,
+        queue_size=config.queue_size,
+        negative_cache_ttl_seconds=config.negative_cache_ttl_seconds,
+        rate_controller=make_rate_controller(
+            config.rate_control,
+            config.min_seconds_between_requests,
+            f"{config.location_type} locations",
+        ),
     )
 
 
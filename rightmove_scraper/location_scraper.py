@@ -1,77 +1,45 @@
 import json
 import logging
+import multiprocessing
 import re
-import xml.etree.ElementTree as ET
+import threading
+import time
+from contextlib import closing
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
 from dataclasses import dataclass
-from enum import StrEnum
 from functools import lru_cache
+from heapq import nlargest
 from itertools import count
 from math import isinf
 from pathlib import Path
-from typing import Any, Iterable, TypedDict
-from urllib.parse import urlencode
+from queue import Full, Queue
+from typing import Any, Iterable, Iterator
 
 from bs4 import BeautifulSoup
 from requests import HTTPError
 from tqdm import tqdm
-from utils_python import (
-    dump_data,
-    make_get_request_to_url,
-    print_tqdm,
-    read_dict_from_file,
-)
+from utils_python import print_tqdm, read_dict_from_file
 
-from rightmove_scraper.utils import snake_to_camel_case
+from rightmove_scraper.models import DEFAULT_QUERY, Channel, LocationType
+from rightmove_scraper.negative_cache import NegativeCache
+from rightmove_scraper.rate_control import (
+    AdaptiveRateController,
+    make_rate_controlled_request,
+)
+from rightmove_scraper.records import (
+    LocationRecord,
+    iter_result_dicts,
+    records_from_entries,
+)
+from rightmove_scraper.urls import make_api_url, make_scrape_url
+from rightmove_scraper.utils import dump_json_items, get_sitemap_paths, iter_sitemap_locs
 
 LOGGER = logging.getLogger(__name__)
 
-
-class LocationType(StrEnum):
-    STATION = "STATION"
-    REGION = "REGION"
-    OUTCODE = "OUTCODE"
-    POSTCODE = "POSTCODE"
-
-
-class Channel(StrEnum):
-    RENT = "property-to-rent"
-    BUY = "property-for-sale"
-
-
-DEFAULT_CHANNEL = Channel.RENT
-
-
-def make_url_query(**query: Any) -> str:
-    query_dict = {snake_to_camel_case(k): v for k, v in query.items()}
-    return urlencode(query_dict)
-
-
-def make_scrape_url(
-    location_identifier: str,
-    channel: Channel = DEFAULT_CHANNEL,
-    **query: Any,
-) -> str:
-    url_base = f"https://www.rightmove.co.uk/{channel}/find.html"
-    url_query = make_url_query(
-        location_identifier=location_identifier,
-        **query,
-    )
-    return f"{url_base}?{url_query}"
-
-
-def make_api_url(
-    location_identifier: str,
-    channel: Channel = DEFAULT_CHANNEL,
-    **query: Any,
-) -> str:
-    url_base = "https://www.rightmove.co.uk/api/_search"
-    url_query = make_url_query(
-        location_identifier=location_identifier,
-        channel=channel,
-        **query,
-    )
-    return f"{url_base}?{url_query}"
-
+# how often a fetcher waiting on the pipeline checks whether it has been stopped
+STOP_POLL_SECONDS = 0.1
+# how long a stopped pipeline waits for its fetchers' last requests
+FETCHER_JOIN_TIMEOUT_SECONDS = 10.0
 
 AREA_PATTERN = r"(?:Properties (?:To Rent|For Sale) (?:in|near) )?{}, (.*?)(:?, within .*)?$"
 
@@ -108,39 +76,23 @@ def get_area_from_soup(soup: BeautifulSoup) -> str:
     return get_area_from_text(text_full, name)
 
 
-def get_indices_from_sitemaps(
-    sitemap_dir: Path,
+def get_sitemap_category(location_type: LocationType) -> str:
+    return f"{location_type.lower()}s"
+
+
+def iter_indices_from_sitemap_paths(
+    sitemap_paths: Iterable[Path],
     location_type: LocationType,
-) -> set[int] | None:
-    sitemap_type = f"{location_type.lower()}s"
-    sitemap_subdir = Path(sitemap_dir, sitemap_type)
-    all_known_indices: set[int] = set()
-    if not sitemap_subdir.is_dir():
-        return None
-    for xml_path in (pbar := tqdm(list(sitemap_subdir.glob("*.xml")))):
-        pbar.set_description(str(xml_path))
-        tree = ET.parse(xml_path)
-        namespace = {"": "http://www.sitemaps.org/schemas/sitemap/0.9"}
-        for url in tree.getroot().findall(".//url", namespace):
-            loc_element = url.find("loc", namespace)
-            if loc_element is None or not isinstance(loc_element.text, str):
-                continue
-            loc_text = loc_element.text.strip()
-            match = re.search(rf"{location_type}%5E(\d+)", loc_text)
-            if match:
-                all_known_indices.add(int(match.group(1)))
-    return all_known_indices
-
-
-class ResultDict(TypedDict):
-    identifier: str
-    name: str
-    area: str
-    index: int
-    type: LocationType
-    url: str
-    # url_api: str
-    closest_property_coords: tuple[float, float] | None
+) -> Iterator[int]:
+    seen_indices: set[int] = set()
+    pattern = re.compile(rf"{location_type}%5E(\d+)")
+    for sitemap_path in sitemap_paths:
+        LOGGER.debug(f"Reading indices from '{sitemap_path}'")
+        for loc_text in iter_sitemap_locs(sitemap_path):
+            match = pattern.search(loc_text)
+            if match and (index := int(match.group(1))) not in seen_indices:
+                seen_indices.add(index)
+                yield index
 
 
 def get_chunk_range_from_string(range_str: str) -> tuple[int, int]:
@@ -175,6 +127,40 @@ def get_closest_property_coords(json_model: dict[str, Any]) -> tuple[float, floa
         return None
 
 
+def parse_location_page(
+    html: str,
+    location_type: LocationType,
+    location_index: int,
+    fetched_at: float | None = None,
+) -> LocationRecord:
+    # module-level so that it can be pickled and run in a process pool
+    soup = BeautifulSoup(html, "html.parser")
+
+    json_model = get_json_model_from_soup(soup)
+    closest_property_coords = get_closest_property_coords(json_model)
+
+    return LocationRecord(
+        index=location_index,
+        type=location_type,
+        name=get_name_from_soup(soup),
+        area=get_area_from_soup(soup),
+        closest_property_coords=closest_property_coords,
+        fetched_at=time.time() if fetched_at is None else fetched_at,
+    )
+
+
+class _FetcherDone:
+    pass
+
+
+@dataclass
+class _FetchedPage:
+    sequence: int
+    location_index: int
+    html: str | None
+    fetched_at: float
+
+
 @dataclass
 class RightmoveLocationScraper:
     output_dir: Path
@@ -185,21 +171,33 @@ class RightmoveLocationScraper:
     all_known_indices: set[int] | None = None
     sitemap_dir: Path | None = None
     use_sitemap: bool = False
-    query = {
-        "sort_type": 4,
-        "radius": 40.0,
-    }
+    fetch_workers: int = 1
+    parse_workers: int = 0
+    queue_size: int = 16
+    rate_controller: AdaptiveRateController | None = None
+    negative_cache_ttl_seconds: float | None = None
+    query = DEFAULT_QUERY
 
     def __post_init__(self) -> None:
-        if self.sitemap_dir and self.location_type is LocationType.STATION and self.use_sitemap:
-            # currently only supports station sitemap, which has identifiers
-            # problem: some stations may now be present on the website but not in the sitemaps (e.g. Abbey Wood)
-            #  `use_sitemap = False` works around this
-            known_indices = get_indices_from_sitemaps(self.sitemap_dir, self.location_type)
-            if known_indices:
-                self.all_known_indices = known_indices
-
-    def get_one(self, i: int) -> ResultDict | None:
+        if self.rate_controller is None:
+            self.rate_controller = AdaptiveRateController(min_delay=self.min_seconds_between_requests or 0)
+
+    @property
+    def uses_sitemap_indices(self) -> bool:
+        # currently only supports station sitemap, which has identifiers
+        # problem: some stations may now be present on the website but not in the sitemaps (e.g. Abbey Wood)
+        #  `use_sitemap = False` works around this
+        return bool(self.sitemap_dir and self.location_type is LocationType.STATION and self.use_sitemap)
+
+    def iter_known_indices(self) -> Iterator[int]:
+        if self.all_known_indices:
+            yield from sorted(self.all_known_indices)
+        elif self.uses_sitemap_indices:
+            assert self.sitemap_dir is not None
+            sitemap_subdir = Path(self.sitemap_dir, get_sitemap_category(self.location_type))
+            yield from iter_indices_from_sitemap_paths(get_sitemap_paths(sitemap_subdir), self.location_type)
+
+    def get_one(self, i: int) -> LocationRecord | None:
         if self.use_api:
             # return self.get_one_api(i)
             raise NotImplementedError
@@ -210,37 +208,259 @@ class RightmoveLocationScraper:
     def location_filepath(self) -> Path:
         return Path(self.output_dir, f"{self.location_type}-all").with_suffix(".json")
 
+    @property
+    def negative_cache_filepath(self) -> Path:
+        return Path(self.output_dir, f"{self.location_type}-empty").with_suffix(".json")
+
+    def read_negative_cache(self) -> NegativeCache:
+        return NegativeCache.from_file(self.negative_cache_filepath, self.negative_cache_ttl_seconds)
+
     def get_and_write_all(
         self,
         start_index: int | None = None,
         end_index: int | float | None = None,
+        known_indices: Iterable[int] | None = None,
     ) -> None:
-
-        results = {}
+        # without an end_index, crawls known_indices (or those in the sitemaps on disk) if any, else every index
+        negative_cache = self.read_negative_cache()
+        results: dict[int, LocationRecord] = {}
+        first_known_index = start_index or 0
         if start_index is None:
-            start_index = 0
-            if self.location_filepath.is_file():
-                results = read_dict_from_file(self.location_filepath)
-                if results:
-                    latest_index = self.identifier_to_index(max(results.keys(), key=self.identifier_to_index))
-                    start_index = latest_index + 1
+            results = self.read_results(negative_cache)
+            latest_index = max(results, default=-1)
+            if negative_cache.max_index is not None:
+                latest_index = max(latest_index, negative_cache.max_index)
+            start_index = latest_index + 1
         iterator: Iterable[int]
+        if known_indices is None and (self.all_known_indices or self.uses_sitemap_indices):
+            known_indices = self.iter_known_indices()
         if end_index is None or isinf(end_index):
-            if end_index is None and self.all_known_indices:
-                iterator = sorted(list(self.all_known_indices))
-                iterator = [i for i in iterator if i >= start_index]
+            if end_index is None and known_indices is not None:
+                iterator = self.iter_unscraped_indices(known_indices, results, first_known_index, start_index)
             else:
                 iterator = count(start_index)
         else:
             assert not isinstance(end_index, float), f'Invalid float {end_index=} - only float("inf") is supported'
             iterator = range(start_index, end_index)
+        # the iterator is advanced on the fetcher threads while results update `negative_cache` on this one,
+        # so skip the indices that were known 404s at the start
+        known_empty_indices = negative_cache.copy()
+        iterator = (i for i in iterator if i not in known_empty_indices)
+
+        # closed explicitly so that the pipeline is stopped while its threads can still run, even if storing fails
+        with closing(self.iter_results(iterator)) as scraped_results:
+            for current_index, result in (pbar := tqdm(scraped_results)):
+                pbar.set_description(self.get_identifier(current_index))
+                if self.rate_controller is not None:
+                    pbar.set_postfix(
+                        rate=f"{self.rate_controller.rate:.2f}/s",
+                        throttles=self.rate_controller.throttles,
+                    )
+                self.store_result(results, negative_cache, current_index, result)
+
+    def iter_unscraped_indices(
+        self,
+        known_indices: Iterable[int],
+        results: dict[int, LocationRecord],
+        first_known_index: int,
+        start_index: int,
+    ) -> Iterator[int]:
+        # known indices aren't necessarily in order, so rather than resuming after the latest result,
+        # skip those that already have one
+        found_known_index = False
+        for i in known_indices:
+            found_known_index = True
+            if i >= first_known_index and i not in results:
+                yield i
+        if not found_known_index:
+            LOGGER.warning(
+                f"No known {self.location_type} indices (e.g. no {get_sitemap_category(self.location_type)} sitemaps),"
+                f" trying every index from {start_index}"
+            )
+            yield from count(start_index)
+
+    def refresh(
+        self,
+        max_requests: int,
+        ttl_seconds: float | None = None,
+    ) -> None:
+        # stalest first: age weighted by how often a result has changed, with results never timestamped the stalest
+        negative_cache = self.read_negative_cache()
+        results = self.read_results(negative_cache)
+        indices = self.get_refresh_indices(results, max_requests, ttl_seconds)
+        LOGGER.info(f"Refreshing {len(indices)} of {len(results)} {self.location_type} results")
+        with closing(self.iter_results(indices)) as scraped_results:
+            for current_index, result in (pbar := tqdm(scraped_results)):
+                pbar.set_description(self.get_identifier(current_index))
+                previous = results.get(current_index)
+                if result is not None and previous is not None:
+                    result.change_count = previous.change_count
+                    if result.has_changed_from(previous):
+                        result.change_count += 1
+                        LOGGER.info(f"{result.identifier} changed: {previous!r} -> {result!r}")
+                self.store_result(results, negative_cache, current_index, result)
 
-        for current_index in (pbar := tqdm(iterator)):
-            identifier = self.get_identifier(current_index)
-            pbar.set_description(identifier)
-            result = self.get_one(current_index)
-            results[identifier] = result
-            dump_data(results, self.location_filepath)
+    @staticmethod
+    def get_refresh_indices(
+        results: dict[int, LocationRecord],
+        max_requests: int,
+        ttl_seconds: float | None = None,
+        now: float | None = None,
+    ) -> list[int]:
+        now = time.time() if now is None else now
+
+        def staleness(record: LocationRecord) -> float:
+            if record.fetched_at is None:
+                return float("inf")
+            return (now - record.fetched_at) * (1 + record.change_count)
+
+        candidates = [
+            record
+            for record in results.values()
+            if ttl_seconds is None or record.fetched_at is None or now - record.fetched_at >= ttl_seconds
+        ]
+        return [record.index for record in nlargest(max_requests, candidates, key=staleness)]
+
+    def read_results(self, negative_cache: NegativeCache | None = None) -> dict[int, LocationRecord]:
+        if not self.location_filepath.is_file():
+            return {}
+        checked_at = self.location_filepath.stat().st_mtime
+        results, empty_indices = records_from_entries(read_dict_from_file(self.location_filepath))
+        if negative_cache is not None:
+            for index in empty_indices:
+                negative_cache.add(index, checked_at)
+        return results
+
+    def write_results(self, results: dict[int, LocationRecord]) -> None:
+        dump_json_items(iter_result_dicts(results.values(), self.channel, self.query), self.location_filepath)
+
+    def store_result(
+        self,
+        results: dict[int, LocationRecord],
+        negative_cache: NegativeCache,
+        location_index: int,
+        result: LocationRecord | None,
+    ) -> None:
+        if result is None:
+            results.pop(location_index, None)
+            negative_cache.add(location_index)
+        else:
+            results[location_index] = result
+            negative_cache.discard(location_index)
+        negative_cache.save()
+        self.write_results(results)
+
+    def iter_results(self, indices: Iterable[int]) -> Iterator[tuple[int, LocationRecord | None]]:
+        # fetch on threads, parse in a process pool (or inline) and yield in order, with at most `queue_size` in flight
+        if self.use_api:
+            raise NotImplementedError
+        if self.fetch_workers < 1 or self.queue_size < 1:
+            raise ValueError(f"Invalid pipeline settings {self.fetch_workers=} {self.queue_size=}")
+
+        sequenced_indices = enumerate(indices)
+        indices_lock = threading.Lock()
+        in_flight = threading.BoundedSemaphore(self.queue_size)
+        stop = threading.Event()
+        pages: Queue[_FetchedPage | _FetcherDone | BaseException] = Queue(maxsize=self.queue_size)
+
+        def acquire_slot() -> bool:
+            # poll so that a fetcher waiting for a slot notices `stop` even if no slot is ever freed
+            while not in_flight.acquire(timeout=STOP_POLL_SECONDS):
+                if stop.is_set():
+                    return False
+            return not stop.is_set()
+
+        def put_page(page: _FetchedPage | _FetcherDone | BaseException) -> bool:
+            # likewise, give up once stopped rather than wait for a reader that has gone
+            while True:
+                try:
+                    pages.put(page, timeout=STOP_POLL_SECONDS)
+                    return True
+                except Full:
+                    if stop.is_set():
+                        return False
+
+        def fetch_worker() -> None:
+            try:
+                while acquire_slot():
+                    with indices_lock:
+                        try:
+                            sequence, location_index = next(sequenced_indices)
+                        except StopIteration:
+                            # pass the slot on so that other fetchers also get to see the end
+                            in_flight.release()
+                            return
+                    identifier = self.get_identifier(location_index)
+                    url = self.get_url_scrape(identifier)
+                    html = self.fetch_one_scrape(url)
+                    if not put_page(_FetchedPage(sequence, location_index, html, time.time())):
+                        return
+            except BaseException as exc:
+                put_page(exc)
+            finally:
+                put_page(_FetcherDone())
+
+        fetchers = [
+            threading.Thread(target=fetch_worker, name=f"fetcher-{i}", daemon=True) for i in range(self.fetch_workers)
+        ]
+        parse_executor: Executor | None = None
+        if self.parse_workers > 0:
+            # the workers start while the fetcher threads are running, so they mustn't be forked
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            parse_executor = ProcessPoolExecutor(
+                self.parse_workers,
+                mp_context=multiprocessing.get_context(start_method),
+            )
+        pending: dict[int, tuple[int, Future[LocationRecord | None]]] = {}
+        next_sequence = 0
+        fetchers_done = 0
+        try:
+            for fetcher in fetchers:
+                fetcher.start()
+            while fetchers_done < len(fetchers):
+                page = pages.get()
+                if isinstance(page, _FetcherDone):
+                    fetchers_done += 1
+                    continue
+                if isinstance(page, BaseException):
+                    raise page
+                pending[page.sequence] = (page.location_index, self.submit_parse(parse_executor, page))
+                while next_sequence in pending:
+                    location_index, future = pending.pop(next_sequence)
+                    yield location_index, future.result()
+                    next_sequence += 1
+                    in_flight.release()
+        finally:
+            stop.set()
+            # fetchers exit once any request they are making finishes
+            deadline = time.monotonic() + FETCHER_JOIN_TIMEOUT_SECONDS
+            for fetcher in fetchers:
+                if fetcher.ident is not None:
+                    fetcher.join(max(0.0, deadline - time.monotonic()))
+            if still_running := [fetcher.name for fetcher in fetchers if fetcher.is_alive()]:
+                LOGGER.warning(f"Fetchers still running after stopping: {still_running}")
+            if parse_executor is not None:
+                parse_executor.shutdown(cancel_futures=True)
+
+    def submit_parse(
+        self,
+        executor: Executor | None,
+        page: _FetchedPage,
+    ) -> Future[LocationRecord | None]:
+        future: Future[LocationRecord | None]
+        if page.html is None:
+            future = Future()
+            future.set_result(None)
+            return future
+        args = (page.html, self.location_type, page.location_index, page.fetched_at)
+        if executor is not None:
+            return executor.submit(parse_location_page, *args)
+        future = Future()
+        try:
+            future.set_result(parse_location_page(*args))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
 
     def get_url_api(
         self,
@@ -264,32 +484,24 @@ class RightmoveLocationScraper:
     def get_one_scrape(
         self,
         location_index: int,
-    ) -> ResultDict | None:
+    ) -> LocationRecord | None:
         identifier = self.get_identifier(location_index)
 
         url = self.get_url_scrape(identifier)
+        html = self.fetch_one_scrape(url)
+        if html is None:
+            return None
+        return parse_location_page(html, self.location_type, location_index, time.time())
+
+    def fetch_one_scrape(self, url: str) -> str | None:
         try:
-            html = make_get_request_to_url(url, min_delay=self.min_seconds_between_requests)
+            assert self.rate_controller is not None
+            html: str = make_rate_controlled_request(self.rate_controller, url)
         except HTTPError as exc:
             if exc.response.status_code in {404}:
                 return None
             raise
-        soup = BeautifulSoup(html, "html.parser")
-
-        json_model = get_json_model_from_soup(soup)
-        closest_property_coords = get_closest_property_coords(json_model)
-
-        result: ResultDict = {
-            "identifier": identifier,
-            "name": get_name_from_soup(soup),
-            "area": get_area_from_soup(soup),
-            "type": self.location_type,
-            "index": location_index,
-            "url": url,
-            # "url_api": self.get_url_api(identifier),
-            "closest_property_coords": closest_property_coords,
-        }
-        return result
+        return html
 
     # def get_one_api(
     #     self,
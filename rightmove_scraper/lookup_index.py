@@ -0,0 +1,186 @@
+import mmap
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+
+from rightmove_scraper.records import LocationRecord
+
+# File layout (little-endian):
+#   header: magic, key count, record count, posting count
+#   u32 key_offsets[keys + 1]         -> into key_blob
+#   u32 posting_offsets[keys + 1]     -> into postings
+#   u32 postings[postings]            -> record ids
+#   u32 record_offsets[records + 1]   -> into record_blob
+#   key_blob:    sorted normalized keys (names and areas), utf-8
+#   record_blob: "identifier\x1fname\x1farea" per record, utf-8
+# Lookups binary-search the sorted keys directly in the mapped file, so opening an index parses nothing.
+
+MAGIC = b"RMLKIDX1"
+HEADER = struct.Struct("<8sIII")
+FIELD_SEPARATOR = "\x1f"
+
+LOOKUP_INDEX_SUFFIX = ".idx"
+
+
+def normalize_key(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    text = re.sub(r"['’]", "", text.casefold())
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    identifier: str
+    name: str
+    area: str
+
+
+def build_lookup_index(records: Iterable[LocationRecord]) -> bytes:
+    record_blobs: list[bytes] = []
+    postings_by_key: dict[str, list[int]] = {}
+    for record_id, record in enumerate(records):
+        record_blobs.append(FIELD_SEPARATOR.join([record.identifier, record.name, record.area]).encode())
+        for key in {normalize_key(record.name), normalize_key(record.area)}:
+            if key:
+                postings_by_key.setdefault(key, []).append(record_id)
+
+    encoded_keys = sorted((key.encode(), record_ids) for key, record_ids in postings_by_key.items())
+    key_offsets = array("I", [0])
+    posting_offsets = array("I", [0])
+    postings = array("I")
+    for key_bytes, record_ids in encoded_keys:
+        key_offsets.append(key_offsets[-1] + len(key_bytes))
+        postings.extend(record_ids)
+        posting_offsets.append(len(postings))
+    record_offsets = array("I", [0])
+    for record_blob in record_blobs:
+        record_offsets.append(record_offsets[-1] + len(record_blob))
+
+    sections = [key_offsets, posting_offsets, postings, record_offsets]
+    if sys.byteorder != "little":
+        for section in sections:
+            section.byteswap()
+    return b"".join(
+        [
+            HEADER.pack(MAGIC, len(encoded_keys), len(record_blobs), len(postings)),
+            *(section.tobytes() for section in sections),
+            *(key_bytes for key_bytes, _ in encoded_keys),
+            *record_blobs,
+        ]
+    )
+
+
+class LookupIndex:
+    # read-only view of a file from build_lookup_index, only mapped on first use
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._file: BinaryIO | None = None
+        self._mmap: mmap.mmap | None = None
+
+    def _open(self) -> mmap.mmap:
+        if self._mmap is not None:
+            return self._mmap
+        if sys.byteorder != "little":
+            raise NotImplementedError("Lookup indexes can only be read on little-endian hosts")
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, key_count, record_count, posting_count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"'{self.path}' is not a lookup index")
+        view = memoryview(self._mmap)
+        position = HEADER.size
+
+        def take_u32(count: int) -> memoryview:
+            nonlocal position
+            section = view[position : position + 4 * count].cast("I")
+            position += 4 * count
+            return section
+
+        self._key_offsets = take_u32(key_count + 1)
+        self._posting_offsets = take_u32(key_count + 1)
+        self._postings = take_u32(posting_count)
+        self._record_offsets = take_u32(record_count + 1)
+        self._key_count = key_count
+        self._key_start = position
+        self._record_start = position + self._key_offsets[key_count]
+        return self._mmap
+
+    def close(self) -> None:
+        # views into the map must be released before it can be closed
+        for attribute in ["_key_offsets", "_posting_offsets", "_postings", "_record_offsets"]:
+            if (section := self.__dict__.pop(attribute, None)) is not None:
+                section.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "LookupIndex":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        self._open()
+        return len(self._record_offsets) - 1
+
+    def _key(self, key_id: int) -> bytes:
+        start = self._key_start + self._key_offsets[key_id]
+        return self._open()[start : self._key_start + self._key_offsets[key_id + 1]]
+
+    def _record(self, record_id: int) -> IndexEntry:
+        start = self._record_start + self._record_offsets[record_id]
+        end = self._record_start + self._record_offsets[record_id + 1]
+        identifier, name, area = self._open()[start:end].decode().split(FIELD_SEPARATOR)
+        return IndexEntry(identifier, name, area)
+
+    def _record_ids(self, key_id: int) -> memoryview:
+        return self._postings[self._posting_offsets[key_id] : self._posting_offsets[key_id + 1]]
+
+    def _iter_key_ids_with_prefix(self, prefix: str) -> Iterator[int]:
+        self._open()
+        prefix_bytes = normalize_key(prefix).encode()
+        key_id = bisect_left(range(self._key_count), prefix_bytes, key=self._key)
+        while key_id < self._key_count and self._key(key_id).startswith(prefix_bytes):
+            yield key_id
+            key_id += 1
+
+    def exact(self, query: str) -> list[IndexEntry]:
+        self._open()
+        query_bytes = normalize_key(query).encode()
+        key_id = bisect_left(range(self._key_count), query_bytes, key=self._key)
+        if key_id == self._key_count or self._key(key_id) != query_bytes:
+            return []
+        return [self._record(record_id) for record_id in self._record_ids(key_id)]
+
+    def complete(self, prefix: str, limit: int | None = 10) -> list[str]:
+        keys: list[str] = []
+        for key_id in self._iter_key_ids_with_prefix(prefix):
+            if limit is not None and len(keys) >= limit:
+                break
+            keys.append(self._key(key_id).decode())
+        return keys
+
+    def prefix(self, prefix: str, limit: int | None = 10) -> list[IndexEntry]:
+        # ordered by matching key, each entry once
+        seen: set[int] = set()
+        entries: list[IndexEntry] = []
+        for key_id in self._iter_key_ids_with_prefix(prefix):
+            for record_id in self._record_ids(key_id):
+                if limit is not None and len(entries) >= limit:
+                    return entries
+                if record_id not in seen:
+                    seen.add(record_id)
+                    entries.append(self._record(record_id))
+        return entries
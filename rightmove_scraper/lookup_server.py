@@ -0,0 +1,217 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from utils_python import read_dict_from_file
+
+from rightmove_scraper.lookup_index import normalize_key
+from rightmove_scraper.models import LocationType, ResultDict
+from rightmove_scraper.records import LocationRecord
+
+LOGGER = logging.getLogger(__name__)
+
+MAPPINGS_GLOB = "*-mappings-by-*.json"
+MAX_BATCH_SIZE = 10_000
+
+FileSignature = tuple[tuple[str, int, int], ...]
+
+
+def get_mappings_signature(mappings_dir: Path) -> FileSignature:
+    signature = []
+    for path in sorted(mappings_dir.glob(MAPPINGS_GLOB)):
+        stat = path.stat()
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+@dataclass
+class MappingIndexes:
+    records: dict[str, LocationRecord] = field(default_factory=dict)
+    by_name: dict[str, list[str]] = field(default_factory=dict)
+    by_area: dict[str, list[str]] = field(default_factory=dict)
+    signature: FileSignature = ()
+    loaded_at: float = field(default_factory=time.time)
+
+    def add(self, record: LocationRecord) -> None:
+        if record.identifier in self.records:
+            return
+        self.records[record.identifier] = record
+        self.by_name.setdefault(normalize_key(record.name), []).append(record.identifier)
+        self.by_area.setdefault(normalize_key(record.area), []).append(record.identifier)
+
+    @classmethod
+    def from_dir(cls, mappings_dir: Path) -> "MappingIndexes":
+        # every mappings file holds the same records grouped by a different key, so they are merged by identifier
+        signature = get_mappings_signature(mappings_dir)
+        indexes = cls(signature=signature)
+        for path_str, _mtime, _size in signature:
+            mappings: dict[str, list[ResultDict]] = read_dict_from_file(Path(path_str))
+            for entries in mappings.values():
+                for entry in entries:
+                    indexes.add(LocationRecord.from_result_dict(entry))
+        return indexes
+
+    def lookup(self, query: Any) -> list[LocationRecord]:
+        # by identifier if `index` is given, else by normalized exact name and/or area; ValueError if malformed
+        if not isinstance(query, dict):
+            raise ValueError(f"Query must be an object: {query!r}")
+        location_type = get_location_type(query)
+
+        if (index := query.get("index")) is not None:
+            # an integer from a JSON body, or digits from a query string - not e.g. 1.5 or true
+            if isinstance(index, str) and index.isascii() and index.isdigit():
+                index = int(index)
+            elif not isinstance(index, int) or isinstance(index, bool):
+                raise ValueError(f"Invalid 'index': {index!r}")
+            location_types = list(LocationType) if location_type is None else [location_type]
+            identifiers = [f"{each_type}^{index}" for each_type in location_types]
+            return [self.records[identifier] for identifier in identifiers if identifier in self.records]
+
+        name, area = query.get("name"), query.get("area")
+        if name is None and area is None:
+            raise ValueError(f"Query needs at least one of 'index', 'name' or 'area': {query!r}")
+        for field_name, value in [("name", name), ("area", area)]:
+            if value is not None and not isinstance(value, str):
+                raise ValueError(f"Invalid {field_name!r}: {value!r}")
+        if name is not None:
+            identifiers = self.by_name.get(normalize_key(name), [])
+            if area is not None:
+                normalized_area = normalize_key(area)
+                identifiers = [i for i in identifiers if normalize_key(self.records[i].area) == normalized_area]
+        else:
+            identifiers = self.by_area.get(normalize_key(area), [])
+        records = [self.records[identifier] for identifier in identifiers]
+        if location_type is not None:
+            records = [record for record in records if record.type == location_type]
+        return records
+
+
+def get_location_type(query: dict[str, Any]) -> LocationType | None:
+    if not (location_type := query.get("type")):
+        return None
+    try:
+        return LocationType(location_type)
+    except ValueError:
+        expected = ", ".join(LocationType)
+        raise ValueError(f"Invalid 'type': {location_type!r} (expected one of {expected})") from None
+
+
+class MappingStore:
+    # swaps in freshly loaded indexes whenever the mapping files change
+    def __init__(self, mappings_dir: Path, reload_interval: float = 5.0) -> None:
+        self.mappings_dir = mappings_dir
+        self.reload_interval = reload_interval
+        self.indexes = MappingIndexes.from_dir(mappings_dir)
+        LOGGER.info(f"Loaded {len(self.indexes.records)} records from '{mappings_dir}'")
+        self._stop = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name="mappings-watcher", daemon=True)
+
+    def start_watching(self) -> None:
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def reload_if_changed(self) -> bool:
+        if get_mappings_signature(self.mappings_dir) == self.indexes.signature:
+            return False
+        try:
+            indexes = MappingIndexes.from_dir(self.mappings_dir)
+        except (OSError, ValueError) as exc:
+            # most likely step 3 is still writing - keep serving the old data and try again later
+            LOGGER.warning(f"Failed to reload mappings from '{self.mappings_dir}': {exc!r}")
+            return False
+        # a single attribute assignment, so request threads see either the old or the new indexes
+        self.indexes = indexes
+        LOGGER.info(f"Reloaded {len(indexes.records)} records from '{self.mappings_dir}'")
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            self.reload_if_changed()
+
+
+class LookupRequestHandler(BaseHTTPRequestHandler):
+    # GET /lookup?name=&area=&type=&index=, POST /lookup {"queries": [...]} and GET /health
+    server: "LookupServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        LOGGER.debug(format, *args)
+
+    def send_json(self, data: Any, status: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def lookup(self, indexes: MappingIndexes, query: Any) -> list[ResultDict]:
+        return [record.to_result_dict() for record in indexes.lookup(query)]
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        indexes = self.server.store.indexes
+        if url.path == "/health":
+            self.send_json({"records": len(indexes.records), "loaded_at": indexes.loaded_at})
+        elif url.path == "/lookup":
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            try:
+                self.send_json({"results": self.lookup(indexes, query)})
+            except ValueError as exc:
+                self.send_json({"error": str(exc)}, HTTPStatus.BAD_REQUEST)
+        else:
+            self.send_json({"error": f"Unknown path '{url.path}'"}, HTTPStatus.NOT_FOUND)
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        if url.path != "/lookup":
+            self.send_json({"error": f"Unknown path '{url.path}'"}, HTTPStatus.NOT_FOUND)
+            return
+        try:
+            # json.JSONDecodeError is a ValueError
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            queries = body.get("queries") if isinstance(body, dict) else None
+            if not isinstance(queries, list) or len(queries) > MAX_BATCH_SIZE:
+                raise ValueError(f"Body must be {{\"queries\": [...]}} with at most {MAX_BATCH_SIZE} queries")
+            if invalid := [query for query in queries if not isinstance(query, dict)]:
+                raise ValueError(f"Queries must be objects: {invalid[0]!r}")
+            # use one snapshot for the whole batch so a reload can't split it
+            indexes = self.server.store.indexes
+            results = [self.lookup(indexes, query) for query in queries]
+        except ValueError as exc:
+            self.send_json({"error": str(exc)}, HTTPStatus.BAD_REQUEST)
+            return
+        self.send_json({"results": results})
+
+
+class LookupServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], store: MappingStore) -> None:
+        super().__init__(address, LookupRequestHandler)
+        self.store = store
+
+
+def serve(
+    mappings_dir: Path,
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    reload_interval: float = 5.0,
+) -> None:
+    store = MappingStore(mappings_dir, reload_interval)
+    store.start_watching()
+    with LookupServer((host, port), store) as server:
+        LOGGER.info(f"Serving lookups on http://{host}:{server.server_port}")
+        try:
+            server.serve_forever()
+        finally:
+            store.stop_watching()
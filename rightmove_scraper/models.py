@@ -0,0 +1,52 @@
+from enum import Enum, StrEnum
+from typing import NotRequired, TypedDict
+
+# kept free of third-party imports so that config and the CLI stay cheap to import
+
+
+class LocationType(StrEnum):
+    STATION = "STATION"
+    REGION = "REGION"
+    OUTCODE = "OUTCODE"
+    POSTCODE = "POSTCODE"
+
+
+class Channel(StrEnum):
+    RENT = "property-to-rent"
+    BUY = "property-for-sale"
+
+
+DEFAULT_CHANNEL = Channel.RENT
+
+DEFAULT_QUERY = {
+    "sort_type": 4,
+    "radius": 40.0,
+}
+
+
+class SitemapType(Enum):
+    PROPERTIES = "properties"
+    STATIONS = "stations"
+    STATIC = "static"
+    OVERSEAS = "overseas"
+    AGENTS = "agents"
+    OUTCODES = "outcodes"
+    REGIONS = "regions"
+
+
+DEFAULT_ROOT_SITEMAP_URL = "https://www.rightmove.co.uk/sitemap.xml"
+
+
+class ResultDict(TypedDict):
+    identifier: str
+    name: str
+    area: str
+    index: int
+    type: LocationType
+    url: str
+    # url_api: str
+    closest_property_coords: tuple[float, float] | None
+    # unix time of the scrape; missing for results from before it was recorded
+    fetched_at: NotRequired[float]
+    # number of refreshes that found a different name or area
+    change_count: NotRequired[int]
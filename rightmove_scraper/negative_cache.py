@@ -0,0 +1,90 @@
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+
+from utils_python import dump_data, read_dict_from_file
+
+
+@dataclass
+class NegativeCache:
+    # 404 indices as [start, stop, checked_at] ranges; merged ranges keep the oldest check, so expire together
+    path: Path
+    ttl_seconds: float | None = None
+    ranges: list[list[float]] = field(default_factory=list)
+    changed: bool = False
+
+    @classmethod
+    def from_file(cls, path: Path, ttl_seconds: float | None = None) -> "NegativeCache":
+        data = read_dict_from_file(path, optional=True) or {}
+        cache = cls(path, ttl_seconds, sorted(data.get("ranges", [])))
+        cache.prune_expired()
+        return cache
+
+    def copy(self) -> "NegativeCache":
+        # add/discard edit ranges in place, so other threads should check membership against a copy
+        return replace(self, ranges=[list(r) for r in self.ranges], changed=False)
+
+    def save(self) -> None:
+        if self.changed:
+            dump_data({"ranges": self.ranges}, self.path)
+            self.changed = False
+
+    def prune_expired(self, now: float | None = None) -> None:
+        if self.ttl_seconds is None:
+            return
+        now = time.time() if now is None else now
+        ranges = [r for r in self.ranges if now - r[2] < self.ttl_seconds]
+        if len(ranges) != len(self.ranges):
+            self.ranges = ranges
+            self.changed = True
+
+    def _find(self, index: int) -> int:
+        # position of the last range starting at or before `index`, or -1
+        return bisect_right(self.ranges, index, key=lambda r: r[0]) - 1
+
+    def __contains__(self, index: int) -> bool:
+        position = self._find(index)
+        return position >= 0 and index < self.ranges[position][1]
+
+    def __len__(self) -> int:
+        return int(sum(stop - start for start, stop, _ in self.ranges))
+
+    @property
+    def max_index(self) -> int | None:
+        return int(self.ranges[-1][1]) - 1 if self.ranges else None
+
+    def add(self, index: int, checked_at: float | None = None) -> None:
+        if index in self:
+            return
+        checked_at = time.time() if checked_at is None else checked_at
+        position = self._find(index)
+        previous = self.ranges[position] if position >= 0 else None
+        following = self.ranges[position + 1] if position + 1 < len(self.ranges) else None
+        joins_previous = previous is not None and previous[1] == index
+        joins_following = following is not None and following[0] == index + 1
+        if joins_previous and joins_following:
+            assert previous is not None and following is not None
+            previous[1] = following[1]
+            previous[2] = min(previous[2], following[2], checked_at)
+            del self.ranges[position + 1]
+        elif joins_previous:
+            assert previous is not None
+            previous[1] = index + 1
+            previous[2] = min(previous[2], checked_at)
+        elif joins_following:
+            assert following is not None
+            following[0] = index
+            following[2] = min(following[2], checked_at)
+        else:
+            self.ranges.insert(position + 1, [index, index + 1, checked_at])
+        self.changed = True
+
+    def discard(self, index: int) -> None:
+        if index not in self:
+            return
+        position = self._find(index)
+        start, stop, checked_at = self.ranges[position]
+        replacement = [r for r in ([start, index, checked_at], [index + 1, stop, checked_at]) if r[0] < r[1]]
+        self.ranges[position : position + 1] = replacement
+        self.changed = True
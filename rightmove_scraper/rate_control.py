@@ -0,0 +1,128 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from requests import HTTPError, Response
+from utils_python import make_get_request_to_url
+
+LOGGER = logging.getLogger(__name__)
+
+THROTTLE_STATUS_CODES = {429, 503}
+
+
+@dataclass
+class AdaptiveRateController:
+    # AIMD: the rate grows additively while healthy, the delay multiplies on throttling, within [min_delay, max_delay]
+    min_delay: float = 0.0
+    max_delay: float = 60.0
+    start_delay: float | None = None
+    adaptive: bool = False
+    additive_increase: float = 0.05
+    backoff_factor: float = 2.0
+    latency_threshold: float = 5.0
+    max_retries: int = 5
+    report_interval: float = 60.0
+    name: str = "requests"
+    delay: float = field(init=False)
+    requests: int = field(default=0, init=False)
+    throttles: int = field(default=0, init=False)
+
+    def __post_init__(self) -> None:
+        self.max_delay = max(self.max_delay, self.min_delay)
+        start_delay = self.min_delay if self.start_delay is None or not self.adaptive else self.start_delay
+        self.delay = self.clamp(start_delay)
+        self._lock = threading.Lock()
+        self._next_request_time = 0.0
+        self._last_report_time = time.monotonic()
+
+    def clamp(self, delay: float) -> float:
+        return min(self.max_delay, max(self.min_delay, delay))
+
+    @property
+    def rate(self) -> float:
+        return 1 / self.delay if self.delay > 0 else float("inf")
+
+    def wait(self) -> None:
+        # thread-safe
+        with self._lock:
+            now = time.monotonic()
+            request_time = max(now, self._next_request_time)
+            self._next_request_time = request_time + self.delay
+        if (sleep_time := request_time - now) > 0:
+            time.sleep(sleep_time)
+
+    def on_response(self, latency: float) -> None:
+        with self._lock:
+            self.requests += 1
+            if self.adaptive and latency < self.latency_threshold and self.delay > self.min_delay:
+                self.delay = self.clamp(1 / (self.rate + self.additive_increase))
+        self.maybe_report()
+
+    def on_throttle(self, retry_after: float | None = None) -> None:
+        with self._lock:
+            self.requests += 1
+            self.throttles += 1
+            if self.adaptive:
+                self.delay = self.clamp(max(self.delay, 0.1) * self.backoff_factor)
+            pause = max(self.delay, retry_after or 0.0)
+            self._next_request_time = max(self._next_request_time, time.monotonic() + pause)
+        LOGGER.warning(
+            f"{self.name}: throttled, backing off to {self.delay:.2f}s between requests (pausing {pause:.1f}s)"
+        )
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "rate": self.rate,
+            "delay": self.delay,
+            "requests": self.requests,
+            "throttles": self.throttles,
+        }
+
+    def maybe_report(self) -> None:
+        now = time.monotonic()
+        if now - self._last_report_time < self.report_interval:
+            return
+        self._last_report_time = now
+        LOGGER.info(
+            f"{self.name}: {self.rate:.2f} req/s ({self.delay:.2f}s delay), "
+            f"{self.throttles} throttled of {self.requests} requests"
+        )
+
+
+def get_retry_after(response: Response | None) -> float | None:
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("Retry-After", ""))
+    except ValueError:
+        # HTTP-date values aren't worth parsing here; the backoff covers them
+        return None
+
+
+def make_rate_controlled_request(
+    controller: AdaptiveRateController,
+    url: str,
+    **kwargs: Any,
+) -> Any:
+    # throttled requests are retried if the controller is adaptive
+    attempt = 0
+    while True:
+        controller.wait()
+        start = time.monotonic()
+        try:
+            response = make_get_request_to_url(url, **kwargs)
+        except HTTPError as exc:
+            status_code = exc.response.status_code if exc.response is not None else None
+            if status_code not in THROTTLE_STATUS_CODES:
+                # e.g. a 404 is still a healthy, timely answer
+                controller.on_response(time.monotonic() - start)
+                raise
+            controller.on_throttle(get_retry_after(exc.response))
+            if not controller.adaptive or attempt >= controller.max_retries:
+                raise
+            attempt += 1
+            continue
+        controller.on_response(time.monotonic() - start)
+        return response
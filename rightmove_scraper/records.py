@@ -0,0 +1,151 @@
+import sys
+from typing import Any, Iterable, Iterator, Mapping
+
+from rightmove_scraper.models import (
+    DEFAULT_CHANNEL,
+    DEFAULT_QUERY,
+    Channel,
+    LocationType,
+    ResultDict,
+)
+from rightmove_scraper.urls import make_scrape_url, make_scrape_url_formatter
+
+
+class LocationRecord:
+    # compact form of a ResultDict: identifier/url are derived, names/areas interned, coordinates as bare floats
+    __slots__ = ("index", "type", "name", "area", "latitude", "longitude", "fetched_at", "change_count")
+
+    def __init__(
+        self,
+        index: int,
+        type: LocationType,
+        name: str,
+        area: str,
+        closest_property_coords: tuple[float, float] | None = None,
+        fetched_at: float | None = None,
+        change_count: int = 0,
+    ) -> None:
+        self.index = index
+        self.type = LocationType(type)
+        self.name = sys.intern(name)
+        self.area = sys.intern(area)
+        self.latitude: float | None
+        self.longitude: float | None
+        if closest_property_coords is None:
+            self.latitude = self.longitude = None
+        else:
+            self.latitude, self.longitude = closest_property_coords
+        self.fetched_at = fetched_at
+        self.change_count = change_count
+
+    @property
+    def identifier(self) -> str:
+        return f"{self.type}^{self.index}"
+
+    @property
+    def closest_property_coords(self) -> tuple[float, float] | None:
+        if self.latitude is None or self.longitude is None:
+            return None
+        return self.latitude, self.longitude
+
+    def get_url(
+        self,
+        channel: Channel = DEFAULT_CHANNEL,
+        query: Mapping[str, Any] = DEFAULT_QUERY,
+    ) -> str:
+        return make_scrape_url(self.identifier, channel, **query)
+
+    @property
+    def url(self) -> str:
+        return self.get_url()
+
+    @classmethod
+    def from_result_dict(cls, result: ResultDict) -> "LocationRecord":
+        coords = result["closest_property_coords"]
+        return cls(
+            index=result["index"],
+            type=result["type"],
+            name=result["name"],
+            area=result["area"],
+            closest_property_coords=None if coords is None else (coords[0], coords[1]),
+            fetched_at=result.get("fetched_at"),
+            change_count=result.get("change_count", 0),
+        )
+
+    def to_result_dict(
+        self,
+        channel: Channel = DEFAULT_CHANNEL,
+        query: Mapping[str, Any] = DEFAULT_QUERY,
+        url: str | None = None,
+    ) -> ResultDict:
+        # a prebuilt `url` (see `iter_result_dicts`) saves encoding the whole query again for every record
+        result: ResultDict = {
+            "identifier": self.identifier,
+            "name": self.name,
+            "area": self.area,
+            "type": self.type,
+            "index": self.index,
+            "url": self.get_url(channel, query) if url is None else url,
+            # "url_api": self.get_url_api(identifier),
+            "closest_property_coords": self.closest_property_coords,
+        }
+        if self.fetched_at is not None:
+            result["fetched_at"] = self.fetched_at
+        if self.change_count:
+            result["change_count"] = self.change_count
+        return result
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        # go through __init__ when unpickled (e.g. from the parse pool) so that names and areas are interned again
+        return (
+            type(self),
+            (
+                self.index,
+                self.type,
+                self.name,
+                self.area,
+                self.closest_property_coords,
+                self.fetched_at,
+                self.change_count,
+            ),
+        )
+
+    def has_changed_from(self, other: "LocationRecord") -> bool:
+        return (self.name, self.area) != (other.name, other.area)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LocationRecord):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(index={self.index!r}, type={self.type!r}, name={self.name!r}, "
+            f"area={self.area!r}, closest_property_coords={self.closest_property_coords!r}, "
+            f"fetched_at={self.fetched_at!r}, change_count={self.change_count!r})"
+        )
+
+
+def records_from_entries(entries: dict[str, ResultDict | None]) -> tuple[dict[int, LocationRecord], list[int]]:
+    # null entries are 404s from before the negative cache existed; their indices are returned separately
+    records: dict[int, LocationRecord] = {}
+    empty_indices: list[int] = []
+    # pop as we go so that only one full copy of the data is held at a time
+    while entries:
+        identifier, entry = entries.popitem()
+        if entry is None:
+            empty_indices.append(int(identifier.split("^")[1]))
+        else:
+            records[entry["index"]] = LocationRecord.from_result_dict(entry)
+    return dict(sorted(records.items())), sorted(empty_indices)
+
+
+def iter_result_dicts(
+    records: Iterable[LocationRecord],
+    channel: Channel = DEFAULT_CHANNEL,
+    query: Mapping[str, Any] = DEFAULT_QUERY,
+) -> Iterator[tuple[str, ResultDict]]:
+    format_url = make_scrape_url_formatter(channel, **query)
+    for record in records:
+        identifier = record.identifier
+        yield identifier, record.to_result_dict(url=format_url(identifier))
@@ -1,16 +1,23 @@
 from __future__ import annotations
 
+import gzip
 import logging
 import re
-from dataclasses import dataclass
-from enum import Enum
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING, Sequence
+from typing import TYPE_CHECKING, Iterator, Sequence
 from urllib.parse import urlsplit
 
 from lxml import etree as ET
 from tqdm import tqdm
-from utils_python import dump_data, make_get_request_to_url
+from utils_python import dump_data
+
+from rightmove_scraper.models import DEFAULT_ROOT_SITEMAP_URL, SitemapType
+from rightmove_scraper.rate_control import (
+    AdaptiveRateController,
+    make_rate_controlled_request,
+)
+from rightmove_scraper.utils import get_sitemap_paths, is_gzipped
 
 if TYPE_CHECKING:
     from lxml.etree import _Element
@@ -22,20 +29,15 @@ def url_to_filename(url: str) -> str:
     return urlsplit(url).path.strip("/")
 
 
-SitemapsByCategory = dict[str, dict[str, Path]]
+def get_compressed_filename(filename: str) -> str:
+    return filename if filename.endswith(".gz") else f"{filename}.gz"
 
 
-class SitemapType(Enum):
-    PROPERTIES = "properties"
-    STATIONS = "stations"
-    STATIC = "static"
-    OVERSEAS = "overseas"
-    AGENTS = "agents"
-    OUTCODES = "outcodes"
-    REGIONS = "regions"
+def get_uncompressed_filename(filename: str) -> str:
+    return filename.removesuffix(".gz")
 
 
-DEFAULT_ROOT_SITEMAP_URL = "https://www.rightmove.co.uk/sitemap.xml"
+SitemapsByCategory = dict[str, dict[str, Path]]
 
 
 @dataclass
@@ -44,6 +46,7 @@ class RightmoveSitemapScraper:
     types: list[SitemapType]
     overwrite: bool = False
     root_xml_tree: _Element | None = None
+    rate_controller: AdaptiveRateController = field(default_factory=lambda: AdaptiveRateController(name="sitemaps"))
 
     def get_root_sitemap(
         self,
@@ -57,7 +60,7 @@ class RightmoveSitemapScraper:
                 root_sitemap_bytes = f.read()
         else:
             LOGGER.info(f"Downloading '{root_sitemap_url}' -> '{root_sitemap_path}'")
-            root_sitemap_bytes = make_get_request_to_url(root_sitemap_url, format="bytes")
+            root_sitemap_bytes = make_rate_controlled_request(self.rate_controller, root_sitemap_url, format="bytes")
             if save:
                 dump_data(root_sitemap_bytes, root_sitemap_path, "wb")
         self.root_xml_tree = ET.fromstring(root_sitemap_bytes)
@@ -83,7 +86,7 @@ class RightmoveSitemapScraper:
             pbar.set_description(sitemap_url)
 
             sitemap_name = url_to_filename(sitemap_url)
-            match = re.match(r"^sitemap-(\w+)-(.+).xml$", sitemap_name)
+            match = re.match(r"^sitemap-(\w+)-(.+?)\.xml(?:\.gz)?$", sitemap_name)
             if match is None:
                 LOGGER.warning(f"Unexpected filename format {sitemap_name}")
                 continue
@@ -92,8 +95,10 @@ class RightmoveSitemapScraper:
                 LOGGER.debug(f"Skipping unwanted '{sitemap_type.value}' sitemap '{sitemap_name}'")
                 continue
 
-            sitemap_path = Path(self.sitemap_dir, category, sitemap_name)
-            if sitemap_path.is_file() and not self.overwrite:
+            sitemap_path = Path(self.sitemap_dir, category, get_compressed_filename(sitemap_name))
+            # an uncompressed copy from before sitemaps were stored gzipped counts as downloaded too
+            legacy_sitemap_path = sitemap_path.with_name(get_uncompressed_filename(sitemap_path.name))
+            if (sitemap_path.is_file() or legacy_sitemap_path.is_file()) and not self.overwrite:
                 LOGGER.debug(f"Skipping existing sitemap '{sitemap_path}'")
                 continue
 
@@ -112,8 +117,11 @@ class RightmoveSitemapScraper:
             LOGGER.info("No sitemaps to download.")
         return sitemaps
 
-    @staticmethod
-    def download_sitemaps(sitemaps: SitemapsByCategory) -> None:
+    def download_sitemaps(self, sitemaps: SitemapsByCategory) -> None:
+        for _category, _sitemap_path in self.iter_download_sitemaps(sitemaps):
+            pass
+
+    def iter_download_sitemaps(self, sitemaps: SitemapsByCategory) -> Iterator[tuple[str, Path]]:
         if not sitemaps:
             return
         LOGGER.info("Downloading sitemaps...")
@@ -122,10 +130,24 @@ class RightmoveSitemapScraper:
             for sitemap_url, sitemap_path in (pbar2 := tqdm(sitemap_urls.items(), leave=False)):
                 pbar2.set_description(sitemap_url)
                 LOGGER.info(f"Downloading '{sitemap_url}' to '{sitemap_path}'")
-                sitemap_bytes = make_get_request_to_url(sitemap_url, format="bytes")
+                sitemap_bytes = make_rate_controlled_request(self.rate_controller, sitemap_url, format="bytes")
+                # `.xml.gz` urls may already have been decompressed in transit
+                if not is_gzipped(sitemap_bytes):
+                    sitemap_bytes = gzip.compress(sitemap_bytes)
                 dump_data(sitemap_bytes, sitemap_path, "wb")
-        LOGGER.info("Downloaded sitemaps.")
+                # don't leave an outdated uncompressed copy around to be read as well
+                sitemap_path.with_name(get_uncompressed_filename(sitemap_path.name)).unlink(missing_ok=True)
+                yield category, sitemap_path
+        LOGGER.info(f"Downloaded sitemaps. {self.rate_controller.stats()}")
 
     def get_and_download_sitemaps(self) -> None:
         sitemaps_to_download = self.get_sitemaps_to_download(self.types)
         self.download_sitemaps(sitemaps_to_download)
+
+    def iter_sitemap_paths(self) -> Iterator[tuple[str, Path]]:
+        # those already on disk first, then the rest as they are downloaded
+        if not self.overwrite:
+            for sitemap_type in self.types:
+                for sitemap_path in get_sitemap_paths(Path(self.sitemap_dir, sitemap_type.value)):
+                    yield sitemap_type.value, sitemap_path
+        yield from self.iter_download_sitemaps(self.get_sitemaps_to_download(self.types))
@@ -0,0 +1,85 @@
+from typing import Iterable, TypedDict
+
+from rightmove_scraper.lookup_index import normalize_key
+from rightmove_scraper.models import LocationType, ResultDict
+from rightmove_scraper.records import LocationRecord
+
+STATION_INDEX_SUFFIX = "-station-index"
+
+# normalized, longest first so that e.g. "underground station" is removed rather than just "station"
+STATION_NAME_SUFFIXES = [
+    "underground station",
+    "overground station",
+    "crossrail station",
+    "rail station",
+    "dlr station",
+    "tram stop",
+    "station",
+]
+
+
+class StationIndexDict(TypedDict):
+    # normalized station name (or "name, area" for names shared by several areas) -> station
+    stations: dict[str, ResultDict]
+    # normalized station name shared by several areas -> its qualified keys in `stations`
+    ambiguous: dict[str, list[str]]
+
+
+def normalize_station_name(name: str) -> str:
+    key = normalize_key(name)
+    for suffix in STATION_NAME_SUFFIXES:
+        if key.endswith(f" {suffix}"):
+            return key.removesuffix(f" {suffix}")
+    return key
+
+
+def qualify_station_key(key: str, area: str) -> str:
+    return f"{key}, {normalize_key(area)}"
+
+
+def build_station_index(records: Iterable[LocationRecord]) -> StationIndexDict:
+    # duplicates (same name and area) keep the lowest index; names shared across areas are only keyed with their area
+    by_key: dict[str, dict[str, LocationRecord]] = {}
+    for record in records:
+        if record.type is not LocationType.STATION:
+            continue
+        by_area = by_key.setdefault(normalize_station_name(record.name), {})
+        area_key = normalize_key(record.area)
+        if area_key not in by_area or record.index < by_area[area_key].index:
+            by_area[area_key] = record
+
+    station_index: StationIndexDict = {"stations": {}, "ambiguous": {}}
+    for key, by_area in sorted(by_key.items()):
+        if len(by_area) == 1:
+            (record,) = by_area.values()
+            station_index["stations"][key] = record.to_result_dict()
+            continue
+        qualified_keys = []
+        for record in sorted(by_area.values(), key=lambda record: record.index):
+            qualified_key = qualify_station_key(key, record.area)
+            station_index["stations"][qualified_key] = record.to_result_dict()
+            qualified_keys.append(qualified_key)
+        station_index["ambiguous"][key] = qualified_keys
+    return station_index
+
+
+def resolve_station(
+    station_index: StationIndexDict,
+    name: str,
+    area: str | None = None,
+) -> ResultDict | None:
+    # ambiguous names are resolved by an `area` matching or contained in exactly one candidate's area
+    key = normalize_station_name(name)
+    if (station := station_index["stations"].get(key)) is not None:
+        return station
+    if area is None or key not in station_index["ambiguous"]:
+        return None
+    if (station := station_index["stations"].get(qualify_station_key(key, area))) is not None:
+        return station
+    area_words = set(normalize_key(area).split())
+    candidates = [
+        station_index["stations"][qualified_key]
+        for qualified_key in station_index["ambiguous"][key]
+        if area_words <= set(normalize_key(station_index["stations"][qualified_key]["area"]).split())
+    ]
+    return candidates[0] if len(candidates) == 1 else None
@@ -0,0 +1,56 @@
+from typing import Any, Callable
+from urllib.parse import quote_plus, urlencode
+
+from rightmove_scraper.models import DEFAULT_CHANNEL, Channel
+from rightmove_scraper.utils import snake_to_camel_case
+
+
+def make_url_query(**query: Any) -> str:
+    query_dict = {snake_to_camel_case(k): v for k, v in query.items()}
+    return urlencode(query_dict)
+
+
+def make_scrape_url_formatter(
+    channel: Channel = DEFAULT_CHANNEL,
+    **query: Any,
+) -> Callable[[str], str]:
+    # encodes everything but the identifier once, for building many URLs
+    url_prefix = f"https://www.rightmove.co.uk/{channel}/find.html?{snake_to_camel_case('location_identifier')}="
+    url_query = make_url_query(**query)
+    url_suffix = f"&{url_query}" if url_query else ""
+
+    quoted_type_prefixes: dict[str, str] = {}
+
+    def format_url(location_identifier: str) -> str:
+        # quoted as `urlencode` would, so the URL is the same as from `make_scrape_url`.
+        # Identifiers are "TYPE^index", so only the few distinct "TYPE^" parts need quoting
+        type_prefix, caret, index = location_identifier.partition("^")
+        if not (caret and index.isascii() and index.isdigit()):
+            return f"{url_prefix}{quote_plus(location_identifier)}{url_suffix}"
+        if (quoted_type_prefix := quoted_type_prefixes.get(type_prefix)) is None:
+            quoted_type_prefix = quoted_type_prefixes[type_prefix] = quote_plus(f"{type_prefix}^")
+        return f"{url_prefix}{quoted_type_prefix}{index}{url_suffix}"
+
+    return format_url
+
+
+def make_scrape_url(
+    location_identifier: str,
+    channel: Channel = DEFAULT_CHANNEL,
+    **query: Any,
+) -> str:
+    return make_scrape_url_formatter(channel, **query)(location_identifier)
+
+
+def make_api_url(
+    location_identifier: str,
+    channel: Channel = DEFAULT_CHANNEL,
+    **query: Any,
+) -> str:
+    url_base = "https://www.rightmove.co.uk/api/_search"
+    url_query = make_url_query(
+        location_identifier=location_identifier,
+        channel=channel,
+        **query,
+    )
+    return f"{url_base}?{url_query}"
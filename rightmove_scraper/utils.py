@@ -1,5 +1,121 @@
+import gzip
+import json
+import logging
+import os
 import re
+import threading
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Queue
+from typing import IO, Any, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+LOGGER = logging.getLogger(__name__)
+
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+GZIP_MAGIC = b"\x1f\x8b"
+# sitemaps are stored gzipped, but uncompressed ones from older runs are still read
+SITEMAP_GLOBS = ["*.xml.gz", "*.xml"]
 
 
 def snake_to_camel_case(snake_str: str) -> str:
     return re.sub(r"_([a-zA-Z])", lambda x: x.group(1).upper(), snake_str)
+
+
+def is_gzipped(data: bytes) -> bool:
+    return data[:2] == GZIP_MAGIC
+
+
+def open_sitemap(path: Path) -> IO[bytes]:
+    with open(path, "rb") as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def get_sitemap_paths(sitemap_subdir: Path) -> list[Path]:
+    return sorted(path for pattern in SITEMAP_GLOBS for path in sitemap_subdir.glob(pattern))
+
+
+def iter_sitemap_locs(path: Path) -> Iterator[str]:
+    # streamed, so the whole tree is never built
+    url_tag = f"{{{SITEMAP_NAMESPACE}}}url"
+    loc_tag = f"{{{SITEMAP_NAMESPACE}}}loc"
+    with open_sitemap(path) as f:
+        for _event, element in ET.iterparse(f, events=("end",)):
+            if element.tag != url_tag:
+                continue
+            loc_element = element.find(loc_tag)
+            if loc_element is not None and isinstance(loc_element.text, str):
+                yield loc_element.text.strip()
+            element.clear()
+
+
+@contextmanager
+def open_replacing(path: Path, mode: str = "w") -> Iterator[IO[Any]]:
+    # write under a temporary name and rename over `path`, so readers (and maps) of the old file never see a partial one
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        with open(temp_path, mode) as f:
+            yield f
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    os.replace(temp_path, path)
+
+
+def dump_json_items(items: Iterable[tuple[Any, Any]], path: Path, chunk_size: int = 1000) -> None:
+    # encoded a chunk at a time so that the whole object is never built in memory
+    with open_replacing(path) as f:
+        separator = ""
+        chunk: dict[str, Any] = {}
+
+        def write_chunk() -> None:
+            nonlocal separator
+            # one `json.dumps` per chunk is much faster than one per item; the chunk's own braces are dropped
+            f.write(f"{separator}{json.dumps(chunk)[1:-1]}")
+            separator = ", "
+            chunk.clear()
+
+        f.write("{")
+        for key, value in items:
+            chunk[str(key)] = value
+            if len(chunk) >= chunk_size:
+                write_chunk()
+        if chunk:
+            write_chunk()
+        f.write("}")
+
+
+class _IterationDone:
+    pass
+
+
+def iter_in_background(iterable: Iterable[T], maxsize: int = 0, name: str = "background-iterator") -> Iterator[T]:
+    # iterated on a background thread from the start; its exceptions are re-raised to the consumer
+    items: Queue[T | _IterationDone | BaseException] = Queue(maxsize)
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                items.put(item)
+        except BaseException as exc:
+            # logged straight away too, as the consumer may not get round to raising it for a long time
+            LOGGER.exception(f"{name} failed")
+            items.put(exc)
+        finally:
+            items.put(_IterationDone())
+
+    threading.Thread(target=produce, name=name, daemon=True).start()
+
+    def consume() -> Iterator[T]:
+        while not isinstance(item := items.get(), _IterationDone):
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    return consume()
@@ -5,18 +5,27 @@ from tflwrapper import line as LineEndpoint
 from tqdm import tqdm
 from utils_python import dump_data, read_dict_from_file, serialize_data
 
-from create_mappings import DEFAULT_MAPPING_DIR
-from utils import DEFAULT_DATA_ROOT
+from rightmove_scraper.base_args import BaseArgsNamespace, add_base_args
+from rightmove_scraper.config import Config
+from rightmove_scraper.station_index import (
+    STATION_INDEX_SUFFIX,
+    StationIndexDict,
+    normalize_station_name,
+    resolve_station,
+)
 
 app_key = None
 
-TFL_DATA_ROOT = Path(DEFAULT_DATA_ROOT, "tfl")
+TFL_DATA_ROOT = Path("data", "tfl")
 
-from argparse import ArgumentParser, Namespace
+# used to pick between Rightmove stations that share a name
+TFL_AREA = "London"
 
+from argparse import ArgumentParser
 
-class ArgsNamespace(Namespace):
-    input_dir: Path
+
+class ArgsNamespace(BaseArgsNamespace):
+    input_dir: Path | None
     output_dir: Path
     mode: str
     line: str | None
@@ -24,15 +33,18 @@ class ArgsNamespace(Namespace):
 
 def parse_args():
     parser = ArgumentParser()
+    add_base_args(parser)
     parser.add_argument(
         "-i",
         "--input-dir",
-        default=DEFAULT_MAPPING_DIR,
-        help="default: '%(default)s'",
+        type=Path,
+        default=None,
+        help="default: mappings dir from config",
     )
     parser.add_argument(
         "-o",
         "--output-dir",
+        type=Path,
         default=TFL_DATA_ROOT,
         help="default: '%(default)s'",
     )
@@ -55,89 +67,66 @@ def get_lines(mode: str):
     return {line["id"]: line for line in line_list}
 
 
-WORDS_TO_REMOVE: set[str] = {" Underground Station", " Rail Station", " DLR Station"}
-# WORDS_TO_APPEND = {"Station"}
-WORDS_TO_APPEND: set[str] = set()
-
 inexact_matches: dict[str, dict[str, dict[str, dict[str, int|float] ]]] = {}
 
+RM_STATION_INDEX: StationIndexDict
+
 
 def get_identifier_from_stoppoint(stoppoint: dict, line, mode):
-    rm_mappings = RM_STATION_MAPPINGS_MODIFIED
-    candidate_names_base = {
+    station_index = RM_STATION_INDEX
+    candidate_names = {
         "stoppoint_commonName": stoppoint["commonName"],
     }
     for i, child in enumerate(stoppoint["children"]):
-        if (commonName := child["commonName"]) not in candidate_names_base.values():
-            candidate_names_base[f"child-{i}_commonName"] = commonName
-    candidate_names = {**candidate_names_base}
-    # print(candidate_names)
-    scores: dict[str, int|float] = {}
-
-    for word in WORDS_TO_REMOVE:
-        for method, candidate_name in candidate_names_base.items():
-            if word not in candidate_name:
-                continue
-            candidate_modified = candidate_name.replace(word, "")
-            if candidate_modified not in candidate_names.values():
-                candidate_names[f"{method}_removed-{word}"] = candidate_modified
+        if (commonName := child["commonName"]) not in candidate_names.values():
+            candidate_names[f"child-{i}_commonName"] = commonName
 
-    for word in WORDS_TO_APPEND:
-        for method, candidate_name in candidate_names_base.items():
-            if candidate_name.endswith(word):
-                continue
-            candidate_modified = candidate_name + (f" {word}")
-            if candidate_modified not in candidate_names.values():
-                candidate_names[f"{method}_added-{word}"] = candidate_modified
-
-    exact_match = False
-    # todo:
-    # extract words like "Rail", "Station", "Tram" from both name types
-    # then get a subset of RM stations which have any words in common with TFL stations
-    # then evaluate similarity with those.
-    # This should help prevent situations like:
-    # {'child-2_commonName': 'Woolwich Station',
-    # 'child-3_commonName': 'Woolwich Crossrail Station',
-    # 'stoppoint_commonName': 'Woolwich'}
-    # Woolwich -> {
-    #     "Norwich Station": 0.8387096774193549,
-    #     "Bloxwich Station": 0.8125,
-    #     "North Dulwich Station": 0.41379310344827586,
-    #     "Northwich Station": 0.7878787878787878,
-    #     "New Cross Station": 0.6976744186046512,
-    #     "Crosshill Station": 0.6976744186046512,
-    #     "Bromley Cross Station": 0.6808510638297872
-    # }
+    # O(1) exact matches against the precomputed index first; normalization covers suffixes like " Rail Station"
+    exact_matches = {}
     for method, name in candidate_names.items():
-        if name in rm_mappings:
-            scores[name] = 1
-            exact_match = True
-            continue
-        matches_list: list[str] = difflib.get_close_matches(name, rm_mappings.keys(), cutoff=0)
-        for match in matches_list:
-            score = difflib.SequenceMatcher(None, name, match).ratio()
-            scores[match] = max(scores.get(match, 0), score)
-
-    if exact_match:
-        exact_matches = {name: score for name, score in scores.items() if score == 1}
-        if len(exact_matches) != 1:
-            breakpoint()
-            # raise NotImplementedError(
-            # f"Got unexpected number of exact_matches {exact_matches} for stopPoint {stoppoint['commonName']}"
-            # )
-        station = list(exact_matches.keys())[0]
-        station_data = rm_mappings[station]
-        # print(f"TFL:{stoppoint['commonName']} -> RM:{station}")#={station_data}
-        #
+        if (station := resolve_station(station_index, name, TFL_AREA)) is not None:
+            exact_matches[station["identifier"]] = station
+    if len(exact_matches) == 1:
+        station_data = next(iter(exact_matches.values()))
+        # print(f"TFL:{stoppoint['commonName']} -> RM:{station_data['name']}")
+        return station_data
+
+    scores: dict[str, int|float] = {}
+    if exact_matches:
+        # the stoppoint's names resolve to more than one RM station
+        scores = {station["name"]: 1 for station in exact_matches.values()}
     else:
-        # todo: save non-exact messages for later examination to eventually create a manual correspondence?
-        # pprint(candidate_names)
-        inexact_matches.setdefault(mode, {}).setdefault(line, {})[
-            stoppoint["commonName"]
-        ] = scores
-        # print(f"{stoppoint['commonName']} ->", serialize_data(scores))
-        # print()
-    # exit()
+        # todo:
+        # extract words like "Rail", "Station", "Tram" from both name types
+        # then get a subset of RM stations which have any words in common with TFL stations
+        # then evaluate similarity with those.
+        # This should help prevent situations like:
+        # {'child-2_commonName': 'Woolwich Station',
+        # 'child-3_commonName': 'Woolwich Crossrail Station',
+        # 'stoppoint_commonName': 'Woolwich'}
+        # Woolwich -> {
+        #     "Norwich Station": 0.8387096774193549,
+        #     "Bloxwich Station": 0.8125,
+        #     "North Dulwich Station": 0.41379310344827586,
+        #     "Northwich Station": 0.7878787878787878,
+        #     "New Cross Station": 0.6976744186046512,
+        #     "Crosshill Station": 0.6976744186046512,
+        #     "Bromley Cross Station": 0.6808510638297872
+        # }
+        for method, name in candidate_names.items():
+            key = normalize_station_name(name)
+            matches_list: list[str] = difflib.get_close_matches(key, station_index["stations"].keys(), cutoff=0)
+            for match in matches_list:
+                score = difflib.SequenceMatcher(None, key, match).ratio()
+                match_name = station_index["stations"][match]["name"]
+                scores[match_name] = max(scores.get(match_name, 0), score)
+
+    # todo: save non-exact messages for later examination to eventually create a manual correspondence?
+    inexact_matches.setdefault(mode, {}).setdefault(line, {})[
+        stoppoint["commonName"]
+    ] = scores
+    # print(f"{stoppoint['commonName']} ->", serialize_data(scores))
+    return None
 
 
 def get_stoppoints(line: str, mode: str):
@@ -151,28 +140,13 @@ def get_stoppoints(line: str, mode: str):
 
 def main():
     args = parse_args()
-    global RM_STATION_MAPPINGS
-    RM_STATION_MAPPINGS = read_dict_from_file(
-        Path(args.input_dir, "STATION-all-mappings-single.json"),
-        # Path(args.input_dir, "STATION-all-mappings-multiple.json"),
+    config = Config.from_file(args.app_config_path)
+    input_dir = args.input_dir or config.mappings.dir
+    global RM_STATION_INDEX
+    RM_STATION_INDEX = read_dict_from_file(
+        Path(input_dir, f"STATION-all{STATION_INDEX_SUFFIX}.json"),
         optional=False,
     )
-    global RM_STATION_MAPPINGS_MODIFIED
-    RM_STATION_MAPPINGS_MODIFIED = {
-        k.replace(" Tram Stop", "").replace(" Station", ""): v
-        for k, v in RM_STATION_MAPPINGS.items()
-    }
-    # print(RM_STATION_MAPPINGS_MODIFIED)
-    # exit()
-
-    # for station_name, station_info in RM_STATION_MAPPINGS.items():
-    #     if not station_name.endswith("Station") and not station_name.endswith("Tram Stop"):
-    #         print(station_name)
-    #         pprint(station_info)
-    #         print()
-    #         # breakpoint()
-    #         # pass
-    # exit()
 
     # dump_data({mode: get_lines(mode) for mode in get_modes()})
     modes = get_modes()